@@ -1,7 +1,17 @@
 import { S3Client, GetObjectCommand, PutObjectCommand } from '@aws-sdk/client-s3';
-import { DEFAULT_THROTTLE, THROTTLE_BOUNDS, type ThrottleState } from './types.js';
+import {
+  DEFAULT_THROTTLE,
+  THROTTLE_BOUNDS,
+  type NvdCache,
+  type NvdResult,
+  type ThrottleState,
+} from './types.js';
 
 const THROTTLE_STATE_KEY = 'cache/throttle-state.json';
+const NVD_CACHE_KEY = 'cache/nvd-cache.json';
+
+// Cached NVD lookups older than this are re-fetched when no incremental sync is available
+const NVD_CACHE_TTL_MS = 24 * 60 * 60 * 1000;
 
 // S3 client - uses default credential chain (env vars, IAM role, etc.)
 let s3Client: S3Client | null = null;
@@ -44,7 +54,7 @@ async function putObject<T>(key: string, data: T): Promise<boolean> {
       new PutObjectCommand({
         Bucket: bucketName,
         Key: key,
-        Body: JSON.stringify(data, null, 2),
+        Body: JSON.stringify(data), // Compact - the NVD cache holds every checked CVE
         ContentType: 'application/json',
       })
     );
@@ -82,6 +92,64 @@ export async function saveThrottleState(state: ThrottleState): Promise<void> {
   }
 }
 
+// Load cached NVD lookups from S3, or return an empty cache
+export async function loadNvdCache(): Promise<NvdCache> {
+  const cache = await getObject<NvdCache>(NVD_CACHE_KEY);
+  if (cache?.entries) {
+    console.log(`      Loaded NVD cache: ${Object.keys(cache.entries).length} CVEs (last sync: ${cache.last_sync || 'never'})`);
+    return { last_sync: cache.last_sync ?? null, entries: cache.entries };
+  }
+  return { last_sync: null, entries: {} };
+}
+
+// Save NVD lookups to S3
+export async function saveNvdCache(cache: NvdCache): Promise<void> {
+  if (await putObject(NVD_CACHE_KEY, cache)) {
+    console.log(`      Saved NVD cache: ${Object.keys(cache.entries).length} CVEs`);
+  }
+}
+
+// Return the cached result for a CVE if it is still current
+// While last_sync is set, modified CVEs are applied incrementally so every entry is current;
+// otherwise entries expire after the TTL
+export function getCachedNvdResult(cache: NvdCache, cveId: string): NvdResult | null {
+  const entry = cache.entries[cveId];
+  if (!entry) return null;
+  if (!cache.last_sync && Date.now() - Date.parse(entry.fetched_at) >= NVD_CACHE_TTL_MS) return null;
+  return entry.result;
+}
+
+// Store a successful lookup - errors are never cached so they get retried next run
+export function setCachedNvdResult(cache: NvdCache, cveId: string, result: NvdResult): void {
+  if (result.status === 'ERROR') return;
+  cache.entries[cveId] = { fetched_at: new Date().toISOString(), result };
+}
+
+// Apply CVEs returned by an incremental lastModified sync
+export function applyNvdUpdates(cache: NvdCache, updates: Map<string, NvdResult>, syncedAt: Date): void {
+  for (const [cveId, result] of updates) {
+    setCachedNvdResult(cache, cveId, result);
+  }
+  cache.last_sync = syncedAt.toISOString();
+}
+
+// Start a new sync baseline when the incremental sync can't be used (first run, gap too long, failure)
+// Entries older than the TTL can't be vouched for, so they are dropped and re-fetched. The baseline
+// goes back to the oldest entry kept, so the next sync picks up anything NVD changed since it was fetched.
+export function resetNvdSync(cache: NvdCache, syncedAt: Date): void {
+  const cutoff = syncedAt.getTime() - NVD_CACHE_TTL_MS;
+  let baseline = syncedAt.getTime();
+  for (const [cveId, entry] of Object.entries(cache.entries)) {
+    const fetchedAt = Date.parse(entry.fetched_at);
+    if (!(fetchedAt >= cutoff)) {
+      delete cache.entries[cveId];
+    } else if (fetchedAt < baseline) {
+      baseline = fetchedAt;
+    }
+  }
+  cache.last_sync = new Date(baseline).toISOString();
+}
+
 // Adjust throttle after a 429 error - reduce concurrency
 export function throttleBackoff(state: ThrottleState): ThrottleState {
   const now = new Date().toISOString();
@@ -6,24 +6,37 @@
  * checks the NVD API for patch status, and generates a static HTML report.
  *
  * Usage:
- *   npx tsx src/index.ts [--limit N]
+ *   npx tsx src/index.ts [--limit N] [--refresh] [--feed]
+ *
+ * Options:
+ *   --limit N: Only check the first N CVEs (for testing)
+ *   --refresh: Discard the NVD cache and rebuild it (re-queries every CVE unless --feed is given)
+ *   --feed: Update the NVD cache from the NVD JSON data feeds instead of API queries
  *
  * Environment Variables:
  *   NVD_API_KEY: Optional NVD API key for faster rate limits (50 req/30s vs 5 req/30s)
- *   S3_BUCKET: S3 bucket for caching throttle state (optional, enables adaptive throttle)
+ *   S3_BUCKET: S3 bucket for caching throttle state and NVD lookups (optional, enables adaptive throttle)
  *   AWS_REGION: AWS region (default: us-east-1)
  */
 
 import { mkdir, writeFile } from 'fs/promises';
-import { existsSync } from 'fs';
+import { createWriteStream, existsSync } from 'fs';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+import { promisify } from 'util';
+import { gzip } from 'zlib';
 import pLimit from 'p-limit';
 import type {
   KevCatalog,
   KevVulnerability,
   CveResult,
+  NvdResult,
+  NvdCache,
   OutputData,
+  Summary,
   ThrottleState,
   RecentCveData,
+  RecentCveSummary,
   CveGroup,
   RecentCve,
 } from './types.js';
@@ -34,15 +47,37 @@ import {
   isCacheEnabled,
   loadThrottleState,
   saveThrottleState,
+  loadNvdCache,
+  saveNvdCache,
+  getCachedNvdResult,
+  setCachedNvdResult,
+  applyNvdUpdates,
+  resetNvdSync,
   throttleBackoff,
   throttleSpeedup,
 } from './cache.js';
-import { checkNvdPatchStatus, fetchRecentCves } from './nvd.js';
+import {
+  checkNvdPatchStatus,
+  fetchModifiedCves,
+  fetchNvdFeed,
+  fetchRecentCves,
+  MAX_MOD_RANGE_DAYS,
+  MODIFIED_FEED_DAYS,
+  NVD_CONCURRENCY,
+} from './nvd.js';
+
+const gzipAsync = promisify(gzip);
 
 // Constants
 const CISA_KEV_URL = 'https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json';
 const OUTPUT_DIR = 'docs';
 
+// Required actions that suggest no full patch exists (matched case-insensitively, no lowercase copy)
+const MITIGATION_ACTION_RE = /apply mitigations|discontinue use/i;
+
+// Description length shown in the report table (full text is in the tooltip)
+const DESCRIPTION_DISPLAY_LENGTH = 60;
+
 // Rate limiting - API key allows 50 req/30s, without key allows 5 req/30s
 const API_KEY = process.env.NVD_API_KEY;
 
@@ -50,6 +85,11 @@ const API_KEY = process.env.NVD_API_KEY;
 let throttleState: ThrottleState = { ...DEFAULT_THROTTLE };
 let had429Error = false;
 
+interface CheckOptions {
+  refresh: boolean; // Discard cached NVD lookups
+  useFeed: boolean; // Sync the cache from NVD data feeds instead of the API
+}
+
 async function downloadKev(): Promise<KevCatalog> {
   console.log('[1/7] Downloading CISA KEV catalog...');
   const response = await fetch(CISA_KEV_URL);
@@ -62,18 +102,165 @@ async function downloadKev(): Promise<KevCatalog> {
 function filterMitigationCves(kevData: KevCatalog): KevVulnerability[] {
   console.log("[2/7] Filtering CVEs with 'Apply mitigations' or 'discontinue use'...");
 
-  const filtered = (kevData.vulnerabilities || []).filter((vuln) => {
-    const action = (vuln.requiredAction || '').toLowerCase();
-    return action.includes('apply mitigations') || action.includes('discontinue use');
-  });
+  const filtered = (kevData.vulnerabilities || []).filter((vuln) =>
+    MITIGATION_ACTION_RE.test(vuln.requiredAction || '')
+  );
 
   console.log(`      Found ${filtered.length} CVEs to check`);
   return filtered;
 }
 
 
-async function checkAllCves(cves: KevVulnerability[]): Promise<CveResult[]> {
+/**
+ * Combine a KEV entry with its NVD result
+ * Fields are assigned explicitly in a fixed order (rather than spreading the NVD result,
+ * which may come from the cache with keys in any order) so every row shares one object
+ * shape and property reads in the report loop stay monomorphic.
+ */
+function toCveResult(cve: KevVulnerability, nvd: NvdResult): CveResult {
+  const shortDescription = cve.shortDescription || '';
+  return {
+    cve_id: cve.cveID || '',
+    vendor: cve.vendorProject || '',
+    product: cve.product || '',
+    vulnerability_name: cve.vulnerabilityName || '',
+    date_added: cve.dateAdded || '',
+    due_date: cve.dueDate || '',
+    required_action: cve.requiredAction || '',
+    known_ransomware: cve.knownRansomwareCampaignUse || 'Unknown',
+    short_description: shortDescription,
+    short_description_trunc:
+      shortDescription.length > DESCRIPTION_DISPLAY_LENGTH
+        ? shortDescription.substring(0, DESCRIPTION_DISPLAY_LENGTH) + '...'
+        : shortDescription,
+    notes: cve.notes || '',
+    status: nvd.status,
+    has_patch: nvd.has_patch,
+    has_vendor_advisory: nvd.has_vendor_advisory,
+    has_mitigation: nvd.has_mitigation,
+    patch_urls: nvd.patch_urls,
+    cvss_score: nvd.cvss_score,
+    cvss_severity: nvd.cvss_severity,
+    nvd_published: nvd.nvd_published,
+    nvd_last_modified: nvd.nvd_last_modified ?? null,
+    error: nvd.error,
+  };
+}
+
+/**
+ * Bring the NVD cache up to date from the NVD JSON data feeds instead of the API.
+ * Short gaps use the "modified" feed; otherwise the cache is re-seeded from the
+ * yearly feeds covering the tracked CVE IDs. Each feed is a single download.
+ */
+async function syncNvdCacheFromFeeds(
+  nvdCache: NvdCache,
+  wantedIds: Set<string>,
+  syncStart: Date,
+  lastSync: Date | null
+): Promise<void> {
+  const feedRangeMs = MODIFIED_FEED_DAYS * 24 * 60 * 60 * 1000;
+  const reseed = !lastSync || syncStart.getTime() - lastSync.getTime() >= feedRangeMs;
+
+  let feeds: string[];
+  if (!reseed) {
+    feeds = ['modified'];
+  } else {
+    // CVE IDs are filed in the feed for their ID year (CVE-2021-* -> nvdcve-2.0-2021)
+    const years = new Set<string>();
+    for (const cveId of wantedIds) {
+      const year = cveId.split('-')[1];
+      if (year) years.add(year);
+    }
+    feeds = [...years].sort();
+  }
+
+  // A re-seed replaces the whole cache, so only CVEs wanted this run are kept from the feeds
+  const isTracked = reseed
+    ? (cveId: string) => wantedIds.has(cveId)
+    : (cveId: string) => cveId in nvdCache.entries || wantedIds.has(cveId);
+
+  // Download every feed before touching the cache, so a failed download leaves it
+  // intact for the API sync fallback. The cache is only as current as the oldest feed.
+  let syncedAt = syncStart;
+  const updates = new Map<string, NvdResult>();
+  for (const feed of feeds) {
+    const { results, generatedAt } = await fetchNvdFeed(feed, isTracked);
+    console.log(`      Feed ${feed}: ${results.size} tracked CVEs`);
+    for (const [cveId, result] of results) {
+      updates.set(cveId, result);
+    }
+    if (generatedAt && generatedAt < syncedAt) syncedAt = generatedAt;
+  }
+
+  // Entries the yearly feeds didn't cover can't be vouched for as of syncedAt, so drop them all
+  if (reseed) {
+    nvdCache.entries = {};
+  }
+
+  applyNvdUpdates(nvdCache, updates, syncedAt);
+  console.log(`      Updated ${updates.size} cached CVEs from ${feeds.length} feed(s)`);
+}
+
+/**
+ * Bring the NVD cache up to date with one paged lastModified query since the last sync,
+ * instead of re-checking every CVE. Falls back to a fresh baseline when that isn't possible.
+ */
+async function syncNvdCache(nvdCache: NvdCache, cves: KevVulnerability[], options: CheckOptions): Promise<void> {
+  if (options.refresh) {
+    nvdCache.entries = {};
+    nvdCache.last_sync = null;
+  }
+
+  const syncStart = new Date();
+  const lastSync = nvdCache.last_sync ? new Date(nvdCache.last_sync) : null;
+  const maxRangeMs = MAX_MOD_RANGE_DAYS * 24 * 60 * 60 * 1000;
+  // Only CVEs already cached or wanted this run matter, the rest of NVD is skipped
+  const wantedIds = new Set(cves.map((cve) => cve.cveID));
+
+  if (options.useFeed) {
+    try {
+      await syncNvdCacheFromFeeds(nvdCache, wantedIds, syncStart, lastSync);
+      return;
+    } catch (e) {
+      console.log(`      Feed sync failed (${e instanceof Error ? e.message : e}), falling back to the API`);
+    }
+  }
+
+  if (lastSync && syncStart.getTime() - lastSync.getTime() < maxRangeMs) {
+    console.log(`      Syncing CVEs modified since ${nvdCache.last_sync}...`);
+    try {
+      const { results, scanned, had429 } = await fetchModifiedCves(
+        lastSync,
+        syncStart,
+        (cveId) => cveId in nvdCache.entries || wantedIds.has(cveId)
+      );
+      if (had429) {
+        had429Error = true;
+      }
+      applyNvdUpdates(nvdCache, results, syncStart);
+      console.log(`      Updated ${results.size} tracked CVEs from ${scanned} modified in NVD`);
+      return;
+    } catch (e) {
+      console.log(`      Incremental sync failed (${e instanceof Error ? e.message : e}), falling back to per-CVE checks`);
+    }
+  }
+
+  resetNvdSync(nvdCache, syncStart);
+}
+
+async function checkAllCves(cves: KevVulnerability[], nvdCache: NvdCache, options: CheckOptions): Promise<CveResult[]> {
   console.log('[3/7] Checking NVD for patch status...');
+  await syncNvdCache(nvdCache, cves, options);
+
+  // Serve CVEs from the cache, only the gaps go to NVD
+  const cachedResults = new Map<string, NvdResult>();
+  for (const cve of cves) {
+    const cached = getCachedNvdResult(nvdCache, cve.cveID || '');
+    if (cached) cachedResults.set(cve.cveID, cached);
+  }
+  const toFetch = cves.length - cachedResults.size;
+  console.log(`      Cache: ${cachedResults.size} fresh, ${toFetch} to fetch${options.refresh ? ' (--refresh)' : ''}`);
+
   // With API key: 50 requests per 30 seconds = ~600ms per request
   // With concurrency, effective rate: ~600ms / concurrency
   const apiKey = !!process.env.NVD_API_KEY;
@@ -82,55 +269,71 @@ async function checkAllCves(cves: KevVulnerability[]): Promise<CveResult[]> {
   const effectiveDelayMs = (windowSec * 1000) / rateLimit;
   console.log(`      Rate limit: ${rateLimit} requests per ${windowSec}s (${effectiveDelayMs.toFixed(0)}ms between requests)`);
 
-  const total = cves.length;
-  const estMinutes = (total * effectiveDelayMs) / 60000;
+  const estMinutes = (toFetch * effectiveDelayMs) / 60000;
   console.log(`      Estimated time: ${estMinutes.toFixed(1)} minutes`);
 
-  // Use p-limit for concurrency control, rate limiting is handled by waitForRateLimit() in nvd.ts
+  // Use p-limit for concurrency control, rate limiting is handled by waitForRateLimit() in nvd.ts.
+  // Requests are dispatched concurrently so NVD latency overlaps instead of adding up per CVE.
   const limit = pLimit(throttleState.concurrency);
+  const total = cves.length;
   let completed = 0;
 
-  const promises = cves.map((cve) =>
-    limit(async () => {
-      const cveId = cve.cveID || '';
-      const nvdResult = await checkNvdPatchStatus(cveId);
+  const promises = cves.map(async (cve) => {
+    const cveId = cve.cveID || '';
+    let nvdResult = cachedResults.get(cveId);
+
+    if (!nvdResult) {
+      nvdResult = await limit(() => checkNvdPatchStatus(cveId));
+      setCachedNvdResult(nvdCache, cveId, nvdResult);
 
       // Track 429 errors for adaptive throttle
       if (nvdResult.error?.includes('429')) {
         had429Error = true;
       }
+    }
 
-      completed++;
-      const statusEmoji: Record<string, string> = {
-        PATCHED: '✓',
-        MITIGATION_ONLY: '⚠',
-        UNPATCHED: '✗',
-        ERROR: '!',
-      };
-
-      process.stdout.write(`\r      [${completed}/${total}] ${statusEmoji[nvdResult.status] || '?'} ${cveId}`);
-
-      return {
-        cve_id: cveId,
-        vendor: cve.vendorProject || '',
-        product: cve.product || '',
-        vulnerability_name: cve.vulnerabilityName || '',
-        date_added: cve.dateAdded || '',
-        due_date: cve.dueDate || '',
-        required_action: cve.requiredAction || '',
-        known_ransomware: cve.knownRansomwareCampaignUse || 'Unknown',
-        short_description: cve.shortDescription || '',
-        notes: cve.notes || '',
-        ...nvdResult,
-      };
-    })
-  );
+    completed++;
+    const statusEmoji: Record<string, string> = {
+      PATCHED: '✓',
+      MITIGATION_ONLY: '⚠',
+      UNPATCHED: '✗',
+      ERROR: '!',
+    };
+
+    process.stdout.write(`\r      [${completed}/${total}] ${statusEmoji[nvdResult.status] || '?'} ${cveId}`);
+
+    return toCveResult(cve, nvdResult);
+  });
 
   const results = await Promise.all(promises);
   console.log('\n');
   return results;
 }
 
+/**
+ * Count results by status in a single pass
+ */
+function summarizeResults(results: CveResult[]): Summary {
+  const summary: Summary = { unpatched: 0, mitigation_only: 0, patched: 0, errors: 0 };
+  for (const r of results) {
+    switch (r.status) {
+      case 'UNPATCHED':
+        summary.unpatched++;
+        break;
+      case 'MITIGATION_ONLY':
+        summary.mitigation_only++;
+        break;
+      case 'PATCHED':
+        summary.patched++;
+        break;
+      case 'ERROR':
+        summary.errors++;
+        break;
+    }
+  }
+  return summary;
+}
+
 /**
  * Build the grouped output structure for recent CVEs
  */
@@ -139,21 +342,80 @@ function buildRecentCveOutput(cves: RecentCve[]): RecentCveData {
   const sixtyDaysAgo = new Date();
   sixtyDaysAgo.setDate(sixtyDaysAgo.getDate() - 60);
 
-  // Calculate summary
-  const summary = {
-    critical: cves.filter((c) => c.cvss_severity === 'CRITICAL').length,
-    high: cves.filter((c) => c.cvss_severity === 'HIGH').length,
-    medium: cves.filter((c) => c.cvss_severity === 'MEDIUM').length,
-    low: cves.filter((c) => c.cvss_severity === 'LOW').length,
-    none: cves.filter((c) => !c.cvss_severity).length,
-    in_kev: cves.filter((c) => c.is_in_kev).length,
-    with_patch: cves.filter((c) => c.has_patch).length,
+  const summary: RecentCveSummary = {
+    critical: 0,
+    high: 0,
+    medium: 0,
+    low: 0,
+    none: 0,
+    in_kev: 0,
+    with_patch: 0,
   };
 
-  // Group by severity
   const severityOrder = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', null];
+  const severityGroups = new Map<string | null, RecentCve[]>(severityOrder.map((severity) => [severity, []]));
+  const vendorCounts = new Map<string, RecentCve[]>();
+
+  const weekGroups: { label: string; cves: RecentCve[] }[] = [
+    { label: 'This Week', cves: [] },
+    { label: 'Last Week', cves: [] },
+    { label: '2 Weeks Ago', cves: [] },
+    { label: 'Older', cves: [] },
+  ];
+
+  const todayStart = new Date();
+  todayStart.setHours(0, 0, 0, 0);
+  const dayOfWeek = todayStart.getDay();
+  const thisWeekStart = new Date(todayStart);
+  thisWeekStart.setDate(todayStart.getDate() - dayOfWeek);
+
+  // Single pass: summary counts plus severity, vendor and week buckets
+  for (const cve of cves) {
+    switch (cve.cvss_severity) {
+      case 'CRITICAL':
+        summary.critical++;
+        break;
+      case 'HIGH':
+        summary.high++;
+        break;
+      case 'MEDIUM':
+        summary.medium++;
+        break;
+      case 'LOW':
+        summary.low++;
+        break;
+    }
+    if (!cve.cvss_severity) summary.none++;
+    if (cve.is_in_kev) summary.in_kev++;
+    if (cve.has_patch) summary.with_patch++;
+
+    severityGroups.get(cve.cvss_severity)?.push(cve);
+
+    const vendor = cve.vendor || 'Unknown';
+    const vendorCves = vendorCounts.get(vendor);
+    if (vendorCves) {
+      vendorCves.push(cve);
+    } else {
+      vendorCounts.set(vendor, [cve]);
+    }
+
+    const pubDate = new Date(cve.published);
+    const daysAgo = Math.floor((todayStart.getTime() - pubDate.getTime()) / (1000 * 60 * 60 * 24));
+
+    if (pubDate >= thisWeekStart) {
+      weekGroups[0].cves.push(cve);
+    } else if (daysAgo < 14) {
+      weekGroups[1].cves.push(cve);
+    } else if (daysAgo < 21) {
+      weekGroups[2].cves.push(cve);
+    } else {
+      weekGroups[3].cves.push(cve);
+    }
+  }
+
+  // Group by severity
   const bySeverity: CveGroup[] = severityOrder.map((severity) => {
-    const groupCves = cves.filter((c) => c.cvss_severity === severity);
+    const groupCves = severityGroups.get(severity)!;
     return {
       key: severity?.toLowerCase() || 'none',
       label: severity || 'None/Unknown',
@@ -163,15 +425,6 @@ function buildRecentCveOutput(cves: RecentCve[]): RecentCveData {
   }).filter((g) => g.count > 0);
 
   // Group by vendor (top 50 + Other)
-  const vendorCounts = new Map<string, RecentCve[]>();
-  for (const cve of cves) {
-    const vendor = cve.vendor || 'Unknown';
-    if (!vendorCounts.has(vendor)) {
-      vendorCounts.set(vendor, []);
-    }
-    vendorCounts.get(vendor)!.push(cve);
-  }
-
   const sortedVendors = [...vendorCounts.entries()]
     .sort((a, b) => b[1].length - a[1].length);
 
@@ -203,33 +456,6 @@ function buildRecentCveOutput(cves: RecentCve[]): RecentCveData {
 
   // Group by week
   const byWeek: CveGroup[] = [];
-  const weekGroups: { label: string; cves: RecentCve[] }[] = [
-    { label: 'This Week', cves: [] },
-    { label: 'Last Week', cves: [] },
-    { label: '2 Weeks Ago', cves: [] },
-    { label: 'Older', cves: [] },
-  ];
-
-  const todayStart = new Date();
-  todayStart.setHours(0, 0, 0, 0);
-  const dayOfWeek = todayStart.getDay();
-  const thisWeekStart = new Date(todayStart);
-  thisWeekStart.setDate(todayStart.getDate() - dayOfWeek);
-
-  for (const cve of cves) {
-    const pubDate = new Date(cve.published);
-    const daysAgo = Math.floor((todayStart.getTime() - pubDate.getTime()) / (1000 * 60 * 60 * 24));
-
-    if (pubDate >= thisWeekStart) {
-      weekGroups[0].cves.push(cve);
-    } else if (daysAgo < 14) {
-      weekGroups[1].cves.push(cve);
-    } else if (daysAgo < 21) {
-      weekGroups[2].cves.push(cve);
-    } else {
-      weekGroups[3].cves.push(cve);
-    }
-  }
 
   for (let i = 0; i < weekGroups.length; i++) {
     const { label, cves: weekCves } = weekGroups[i];
@@ -261,6 +487,10 @@ async function main(): Promise<void> {
   const args = process.argv.slice(2);
   const limitIndex = args.indexOf('--limit');
   const limitArg = limitIndex !== -1 ? parseInt(args[limitIndex + 1], 10) : null;
+  const options: CheckOptions = {
+    refresh: args.includes('--refresh'),
+    useFeed: args.includes('--feed'),
+  };
 
   console.log('='.repeat(50));
   console.log('KEV Patch Status Checker');
@@ -276,11 +506,7 @@ async function main(): Promise<void> {
   } else {
     // Without S3 cache, use defaults based on API key presence
     // Rate limiting is handled by sliding window in nvd.ts, we just control concurrency
-    if (API_KEY) {
-      throttleState.concurrency = 2;
-    } else {
-      throttleState.concurrency = 1;
-    }
+    throttleState.concurrency = NVD_CONCURRENCY;
     console.log(`      No S3 cache configured, using defaults: concurrency=${throttleState.concurrency} (API key: ${API_KEY ? 'yes' : 'no'})`);
   }
 
@@ -292,7 +518,11 @@ async function main(): Promise<void> {
     console.log(`      (Limited to ${limitArg} CVEs for testing)`);
   }
 
-  const results = await checkAllCves(cves);
+  const nvdCache: NvdCache = isCacheEnabled() ? await loadNvdCache() : { last_sync: null, entries: {} };
+  const results = await checkAllCves(cves, nvdCache, options);
+  if (isCacheEnabled()) {
+    await saveNvdCache(nvdCache);
+  }
 
   // Phase 2: Fetch recent CVEs in bulk
   console.log('[4/7] Fetching recent CVEs in bulk...');
@@ -316,26 +546,29 @@ async function main(): Promise<void> {
     await mkdir(OUTPUT_DIR, { recursive: true });
   }
 
-  const html = generateHtml(results, kevData);
-  await writeFile(`${OUTPUT_DIR}/index.html`, html, 'utf-8');
+  const summary = summarizeResults(results);
+  await pipeline(
+    Readable.from(generateHtml(results, kevData, summary)),
+    createWriteStream(`${OUTPUT_DIR}/index.html`, 'utf-8')
+  );
   console.log(`      HTML report: ${OUTPUT_DIR}/index.html`);
 
   const outputData: OutputData = {
     last_updated: new Date().toISOString(),
     total_kev: kevData.vulnerabilities?.length || 0,
     total_checked: results.length,
-    summary: {
-      unpatched: results.filter((r) => r.status === 'UNPATCHED').length,
-      mitigation_only: results.filter((r) => r.status === 'MITIGATION_ONLY').length,
-      patched: results.filter((r) => r.status === 'PATCHED').length,
-      errors: results.filter((r) => r.status === 'ERROR').length,
-    },
-    vulnerabilities: results,
+    summary,
+    vulnerabilities: results.map(({ short_description_trunc: _trunc, ...row }) => row),
   };
 
-  await writeFile(`${OUTPUT_DIR}/data.json`, JSON.stringify(outputData, null, 2), 'utf-8');
+  const outputJson = JSON.stringify(outputData);
+  await writeFile(`${OUTPUT_DIR}/data.json`, outputJson, 'utf-8');
   console.log(`      JSON data: ${OUTPUT_DIR}/data.json`);
 
+  // Pre-compressed copy for clients downloading the full dataset
+  await writeFile(`${OUTPUT_DIR}/data.json.gz`, await gzipAsync(outputJson, { level: 6 }));
+  console.log(`      JSON data (gzip): ${OUTPUT_DIR}/data.json.gz`);
+
   // Write recent CVE data
   await writeFile(`${OUTPUT_DIR}/recent.json`, JSON.stringify(recentData), 'utf-8');
   console.log(`      Recent CVEs: ${OUTPUT_DIR}/recent.json (${recentData.total} CVEs)`);
@@ -3,30 +3,77 @@
  *
  * Handles all NVD API interactions:
  * - Single CVE lookups (for KEV patch status checking)
+ * - Incremental last-modified queries (for keeping the KEV lookup cache current)
+ * - JSON data feed downloads (bulk alternative to the API for the KEV lookup cache)
  * - Bulk date-range queries (for recent CVEs)
  * - Vendor/product extraction from CPE strings
  */
 
+import { promisify } from 'util';
+import { gunzip } from 'zlib';
 import type { NvdResult, RecentCve, BulkNvdOptions } from './types.js';
 
+const gunzipAsync = promisify(gunzip);
+
 const NVD_API_URL = 'https://services.nvd.nist.gov/rest/json/cves/2.0';
+const NVD_FEED_URL = 'https://nvd.nist.gov/feeds/json/cve/2.0';
 const API_KEY = process.env.NVD_API_KEY;
 const MAX_RETRIES = 3;
 const RETRY_DELAY_MS = 5000;
+const MAX_RETRY_DELAY_MS = 60000;
 const RESULTS_PER_PAGE = 2000; // NVD API maximum
+export const MAX_MOD_RANGE_DAYS = 120; // NVD API maximum for lastModStartDate/lastModEndDate
+export const MODIFIED_FEED_DAYS = 8; // The "modified" data feed covers CVEs changed in the last 8 days
 
 // Rate limiting: 50 requests per 30 seconds with API key, 5 without
 const RATE_LIMIT_WINDOW_MS = 30000;
 const RATE_LIMIT_REQUESTS = API_KEY ? 50 : 5;
 
+// In-flight requests needed to keep the window saturated while NVD responses are slow.
+// Without a key the window only allows one request every 6s, so one in flight is enough.
+export const NVD_CONCURRENCY = API_KEY ? 8 : 1;
+
 // Track request timestamps for sliding window rate limiting
 const requestTimestamps: number[] = [];
 
+// Built once and shared by every request. fetch() keeps pooled keep-alive connections
+// to the NVD host, so all requests reuse the same TLS sessions instead of reconnecting.
+const NVD_HEADERS: Record<string, string> = {
+  'User-Agent': 'youmightwanna-kev-tracker (+https://youmightwanna.org)',
+  ...(API_KEY ? { apiKey: API_KEY } : {}),
+};
+
 const sleep = (ms: number): Promise<void> => new Promise((resolve) => setTimeout(resolve, ms));
 
 /**
- * Wait if necessary to respect rate limits using sliding window algorithm
- * Returns immediately if we haven't hit the limit, otherwise waits until we can make a request
+ * Issue a GET against the NVD CVE API with the shared headers
+ */
+function nvdFetch(query: string, timeoutMs: number): Promise<Response> {
+  return fetch(`${NVD_API_URL}?${query}`, {
+    headers: NVD_HEADERS,
+    signal: AbortSignal.timeout(timeoutMs),
+  });
+}
+
+/**
+ * How long to wait before retrying a 429
+ * Uses the server's Retry-After (seconds or HTTP date) when present, otherwise
+ * exponential backoff, capped at MAX_RETRY_DELAY_MS either way
+ */
+function retryDelayMs(response: Response, retryCount: number): number {
+  const retryAfter = response.headers.get('Retry-After');
+  if (retryAfter) {
+    const seconds = Number(retryAfter);
+    const ms = Number.isFinite(seconds) ? seconds * 1000 : Date.parse(retryAfter) - Date.now();
+    if (ms >= 0) return Math.min(ms, MAX_RETRY_DELAY_MS);
+  }
+  return Math.min(RETRY_DELAY_MS * Math.pow(2, retryCount), MAX_RETRY_DELAY_MS);
+}
+
+/**
+ * Reserve the next request slot in the sliding window and wait for it.
+ * The slot is claimed synchronously before sleeping, so concurrent callers each get
+ * a distinct slot and the window limit holds regardless of how many requests are in flight.
  */
 async function waitForRateLimit(): Promise<void> {
   const now = Date.now();
@@ -37,24 +84,22 @@ async function waitForRateLimit(): Promise<void> {
     requestTimestamps.shift();
   }
 
-  // If we're at the limit, wait until the oldest request expires from the window
+  // If the window is full, the earliest free slot is when the Nth most recent request expires
+  let slot = now;
   if (requestTimestamps.length >= RATE_LIMIT_REQUESTS) {
-    const oldestInWindow = requestTimestamps[0];
-    const waitTime = oldestInWindow + RATE_LIMIT_WINDOW_MS - now + 100; // +100ms buffer
-    if (waitTime > 0) {
-      process.stdout.write(` [rate limit: waiting ${(waitTime / 1000).toFixed(1)}s]`);
-      await sleep(waitTime);
-    }
-    // Clean up again after waiting
-    const newNow = Date.now();
-    const newWindowStart = newNow - RATE_LIMIT_WINDOW_MS;
-    while (requestTimestamps.length > 0 && requestTimestamps[0] < newWindowStart) {
-      requestTimestamps.shift();
-    }
+    slot = requestTimestamps[requestTimestamps.length - RATE_LIMIT_REQUESTS] + RATE_LIMIT_WINDOW_MS + 100; // +100ms buffer
   }
 
-  // Record this request
-  requestTimestamps.push(Date.now());
+  // Record the reservation, keeping timestamps sorted
+  let i = requestTimestamps.length;
+  while (i > 0 && requestTimestamps[i - 1] > slot) i--;
+  requestTimestamps.splice(i, 0, slot);
+
+  const waitTime = slot - now;
+  if (waitTime > 0) {
+    process.stdout.write(` [rate limit: waiting ${(waitTime / 1000).toFixed(1)}s]`);
+    await sleep(waitTime);
+  }
 }
 
 /**
@@ -62,23 +107,17 @@ async function waitForRateLimit(): Promise<void> {
  * Used by KEV tracker to check individual CVEs
  */
 export async function checkNvdPatchStatus(cveId: string, retryCount = 0): Promise<NvdResult> {
-  const headers: Record<string, string> = {};
-  if (API_KEY) headers['apiKey'] = API_KEY;
-
   try {
     // Wait for rate limit before making request
     await waitForRateLimit();
 
-    const response = await fetch(`${NVD_API_URL}?cveId=${cveId}`, {
-      headers,
-      signal: AbortSignal.timeout(30000),
-    });
+    const response = await nvdFetch(`cveId=${encodeURIComponent(cveId)}`, 30000);
 
     // Handle rate limiting with retry
     if (response.status === 429) {
       if (retryCount < MAX_RETRIES) {
-        const delay = RETRY_DELAY_MS * Math.pow(2, retryCount);
-        process.stdout.write(` [429, retry in ${delay / 1000}s]`);
+        const delay = retryDelayMs(response, retryCount);
+        process.stdout.write(` [429, retry in ${(delay / 1000).toFixed(1)}s]`);
         await sleep(delay);
         return checkNvdPatchStatus(cveId, retryCount + 1);
       }
@@ -101,6 +140,7 @@ export async function checkNvdPatchStatus(cveId: string, retryCount = 0): Promis
       cvss_score: null,
       cvss_severity: null,
       nvd_published: null,
+      nvd_last_modified: null,
       error: e instanceof Error ? e.message : String(e),
     };
   }
@@ -110,50 +150,69 @@ export async function checkNvdPatchStatus(cveId: string, retryCount = 0): Promis
  * Parse NVD CVE response data into NvdResult
  */
 function parseNvdCveResponse(data: any): NvdResult {
+  const vulnerabilities = data.vulnerabilities || [];
+  return parseNvdCve(vulnerabilities[0]?.cve || {});
+}
+
+/**
+ * Parse a single NVD CVE record into NvdResult
+ */
+function parseNvdCve(cveData: any): NvdResult {
   let hasPatch = false;
   let hasVendorAdvisory = false;
   let hasMitigation = false;
   const patchUrls: string[] = [];
   let cvssScore: number | null = null;
   let cvssSeverity: string | null = null;
-  let nvdPublished: string | null = null;
 
-  const vulnerabilities = data.vulnerabilities || [];
-  if (vulnerabilities.length > 0) {
-    const cveData = vulnerabilities[0].cve || {};
-    const references = cveData.references || [];
-
-    // Extract NVD published date
-    nvdPublished = cveData.published ? cveData.published.split('T')[0] : null;
-
-    // Extract CVSS score (prefer v3.1, fall back to v3.0, then v2.0)
-    const metrics = cveData.metrics || {};
-    if (metrics.cvssMetricV31?.[0]) {
-      cvssScore = metrics.cvssMetricV31[0].cvssData?.baseScore ?? null;
-      cvssSeverity = metrics.cvssMetricV31[0].cvssData?.baseSeverity ?? null;
-    } else if (metrics.cvssMetricV30?.[0]) {
-      cvssScore = metrics.cvssMetricV30[0].cvssData?.baseScore ?? null;
-      cvssSeverity = metrics.cvssMetricV30[0].cvssData?.baseSeverity ?? null;
-    } else if (metrics.cvssMetricV2?.[0]) {
-      cvssScore = metrics.cvssMetricV2[0].cvssData?.baseScore ?? null;
-      cvssSeverity = metrics.cvssMetricV2[0].baseSeverity ?? null;
-    }
+  const references = cveData.references || [];
 
-    for (const ref of references) {
-      const tags: string[] = ref.tags || [];
-      const url: string = ref.url || '';
+  // Extract NVD published date
+  const nvdPublished: string | null = cveData.published ? cveData.published.split('T')[0] : null;
+  const nvdLastModified: string | null = cveData.lastModified || null;
 
-      if (tags.includes('Patch')) {
-        hasPatch = true;
-        patchUrls.push(url);
-      }
-      if (tags.includes('Vendor Advisory')) {
-        hasVendorAdvisory = true;
-      }
-      if (tags.includes('Mitigation')) {
-        hasMitigation = true;
+  // Extract CVSS score (prefer v3.1, fall back to v3.0, then v2.0)
+  const metrics = cveData.metrics || {};
+  if (metrics.cvssMetricV31?.[0]) {
+    cvssScore = metrics.cvssMetricV31[0].cvssData?.baseScore ?? null;
+    cvssSeverity = metrics.cvssMetricV31[0].cvssData?.baseSeverity ?? null;
+  } else if (metrics.cvssMetricV30?.[0]) {
+    cvssScore = metrics.cvssMetricV30[0].cvssData?.baseScore ?? null;
+    cvssSeverity = metrics.cvssMetricV30[0].cvssData?.baseSeverity ?? null;
+  } else if (metrics.cvssMetricV2?.[0]) {
+    cvssScore = metrics.cvssMetricV2[0].cvssData?.baseScore ?? null;
+    cvssSeverity = metrics.cvssMetricV2[0].baseSeverity ?? null;
+  }
+
+  // Every reference is visited because all patch URLs are reported; each reference's
+  // tags are classified in one pass rather than one includes() scan per tag of interest.
+  // Once advisory and mitigation are both found, only the Patch tag can still matter.
+  for (const ref of references) {
+    const tags: string[] = ref.tags || [];
+
+    let isPatch = false;
+    if (hasVendorAdvisory && hasMitigation) {
+      isPatch = tags.includes('Patch');
+    } else {
+      for (const tag of tags) {
+        switch (tag) {
+          case 'Patch':
+            isPatch = true;
+            break;
+          case 'Vendor Advisory':
+            hasVendorAdvisory = true;
+            break;
+          case 'Mitigation':
+            hasMitigation = true;
+            break;
+        }
       }
     }
+
+    if (isPatch) {
+      hasPatch = true;
+      patchUrls.push(ref.url || '');
+    }
   }
 
   let status: NvdResult['status'];
@@ -174,6 +233,7 @@ function parseNvdCveResponse(data: any): NvdResult {
     cvss_score: cvssScore,
     cvss_severity: cvssSeverity,
     nvd_published: nvdPublished,
+    nvd_last_modified: nvdLastModified,
     error: null,
   };
 }
@@ -281,35 +341,22 @@ function extractFromDescription(description: string): { vendor: string; product:
 }
 
 /**
- * Fetch recent CVEs in bulk using date-range query with pagination
+ * Page through an NVD query, passing each page's vulnerabilities to onPage
+ * onPage returns false to stop before the last page
  * Rate limiting is handled automatically by waitForRateLimit()
  */
-export async function fetchRecentCves(
-  options: BulkNvdOptions
-): Promise<{ cves: RecentCve[]; had429: boolean }> {
-  const { daysBack, maxResults, kevCveIds } = options;
-
-  // Calculate date range
-  const endDate = new Date();
-  const startDate = new Date();
-  startDate.setDate(startDate.getDate() - daysBack);
-
-  const startDateStr = startDate.toISOString().replace('Z', '');
-  const endDateStr = endDate.toISOString().replace('Z', '');
-
-  console.log(`      Date range: ${startDate.toISOString().split('T')[0]} to ${endDate.toISOString().split('T')[0]}`);
-
-  const headers: Record<string, string> = {};
-  if (API_KEY) headers['apiKey'] = API_KEY;
-
-  const allCves: RecentCve[] = [];
+async function fetchNvdPages(
+  query: string,
+  onPage: (vulnerabilities: any[], totalResults: number, pageCount: number) => boolean
+): Promise<{ had429: boolean }> {
   let startIndex = 0;
   let totalResults = 0;
   let had429 = false;
   let pageCount = 0;
+  let keepGoing = true;
 
   do {
-    const url = `${NVD_API_URL}?pubStartDate=${startDateStr}&pubEndDate=${endDateStr}&resultsPerPage=${RESULTS_PER_PAGE}&startIndex=${startIndex}`;
+    const pageQuery = `${query}&resultsPerPage=${RESULTS_PER_PAGE}&startIndex=${startIndex}`;
 
     let response: Response | null = null;
     let retryCount = 0;
@@ -320,16 +367,13 @@ export async function fetchRecentCves(
         // Wait for rate limit before making request
         await waitForRateLimit();
 
-        response = await fetch(url, {
-          headers,
-          signal: AbortSignal.timeout(60000), // Longer timeout for bulk queries
-        });
+        response = await nvdFetch(pageQuery, 60000); // Longer timeout for bulk queries
 
         if (response.status === 429) {
           had429 = true;
           if (retryCount < MAX_RETRIES) {
-            const delay = RETRY_DELAY_MS * Math.pow(2, retryCount);
-            console.log(`      [429 Rate limit - waiting ${delay / 1000}s before retry]`);
+            const delay = retryDelayMs(response, retryCount);
+            console.log(`      [429 Rate limit - waiting ${(delay / 1000).toFixed(1)}s before retry]`);
             await sleep(delay);
             retryCount++;
             continue;
@@ -348,7 +392,7 @@ export async function fetchRecentCves(
           throw e;
         }
         retryCount++;
-        await sleep(RETRY_DELAY_MS * Math.pow(2, retryCount));
+        await sleep(Math.min(RETRY_DELAY_MS * Math.pow(2, retryCount), MAX_RETRY_DELAY_MS));
       }
     }
 
@@ -358,31 +402,132 @@ export async function fetchRecentCves(
 
     const data = await response.json();
     totalResults = data.totalResults || 0;
-    const vulnerabilities = data.vulnerabilities || [];
 
     pageCount++;
-    console.log(
-      `      Page ${pageCount}: fetched ${vulnerabilities.length} CVEs (${allCves.length + vulnerabilities.length}/${Math.min(totalResults, maxResults)})`
-    );
+    keepGoing = onPage(data.vulnerabilities || [], totalResults, pageCount);
 
-    // Process each CVE
-    for (const item of vulnerabilities) {
-      if (allCves.length >= maxResults) break;
+    startIndex += RESULTS_PER_PAGE;
+  } while (keepGoing && startIndex < totalResults);
 
-      const cve = item.cve || {};
-      const recentCve = parseRecentCve(cve, kevCveIds);
-      allCves.push(recentCve);
-    }
+  return { had429 };
+}
 
-    startIndex += RESULTS_PER_PAGE;
-    // Rate limiting is now handled by waitForRateLimit() at the start of each request
-  } while (startIndex < totalResults && allCves.length < maxResults);
+/**
+ * Fetch recent CVEs in bulk using date-range query with pagination
+ */
+export async function fetchRecentCves(
+  options: BulkNvdOptions
+): Promise<{ cves: RecentCve[]; had429: boolean }> {
+  const { daysBack, maxResults, kevCveIds } = options;
+
+  // Calculate date range
+  const endDate = new Date();
+  const startDate = new Date();
+  startDate.setDate(startDate.getDate() - daysBack);
+
+  const startDateStr = startDate.toISOString().replace('Z', '');
+  const endDateStr = endDate.toISOString().replace('Z', '');
+
+  console.log(`      Date range: ${startDate.toISOString().split('T')[0]} to ${endDate.toISOString().split('T')[0]}`);
+
+  const allCves: RecentCve[] = [];
+
+  const { had429 } = await fetchNvdPages(
+    `pubStartDate=${startDateStr}&pubEndDate=${endDateStr}`,
+    (vulnerabilities, totalResults, pageCount) => {
+      console.log(
+        `      Page ${pageCount}: fetched ${vulnerabilities.length} CVEs (${allCves.length + vulnerabilities.length}/${Math.min(totalResults, maxResults)})`
+      );
+
+      // Process each CVE
+      for (const item of vulnerabilities) {
+        if (allCves.length >= maxResults) break;
+
+        const cve = item.cve || {};
+        const recentCve = parseRecentCve(cve, kevCveIds);
+        allCves.push(recentCve);
+      }
+
+      return allCves.length < maxResults;
+    }
+  );
 
   console.log(`      Total fetched: ${allCves.length} CVEs`);
 
   return { cves: allCves, had429 };
 }
 
+/**
+ * Fetch patch status for tracked CVEs modified in a date range
+ * Used to bring the KEV lookup cache up to date in a few paged requests
+ * instead of one request per CVE. NVD limits the range to MAX_MOD_RANGE_DAYS.
+ * Only records accepted by isTracked are parsed and kept, so each page's raw
+ * JSON can be released as soon as it has been scanned.
+ */
+export async function fetchModifiedCves(
+  since: Date,
+  until: Date,
+  isTracked: (cveId: string) => boolean
+): Promise<{ results: Map<string, NvdResult>; scanned: number; had429: boolean }> {
+  const startDateStr = since.toISOString().replace('Z', '');
+  const endDateStr = until.toISOString().replace('Z', '');
+
+  const results = new Map<string, NvdResult>();
+  let scanned = 0;
+
+  const { had429 } = await fetchNvdPages(
+    `lastModStartDate=${startDateStr}&lastModEndDate=${endDateStr}`,
+    (vulnerabilities, totalResults, pageCount) => {
+      scanned += vulnerabilities.length;
+      console.log(`      Page ${pageCount}: ${scanned}/${totalResults} modified CVEs`);
+      for (const item of vulnerabilities) {
+        const cve = item.cve;
+        if (cve?.id && isTracked(cve.id)) {
+          results.set(cve.id, parseNvdCve(cve));
+        }
+      }
+      return true;
+    }
+  );
+
+  return { results, scanned, had429 };
+}
+
+/**
+ * Download one NVD 2.0 JSON data feed ("modified" or a CVE year such as "2024")
+ * and return patch status for the tracked CVEs it contains.
+ * Feeds are static files, so they don't count against the API rate limit.
+ * Also returns when the feed was generated, which tells the cache how current it is.
+ */
+export async function fetchNvdFeed(
+  name: string,
+  isTracked: (cveId: string) => boolean
+): Promise<{ results: Map<string, NvdResult>; generatedAt: Date | null }> {
+  const response = await fetch(`${NVD_FEED_URL}/nvdcve-2.0-${name}.json.gz`, {
+    headers: { 'User-Agent': NVD_HEADERS['User-Agent'] },
+    signal: AbortSignal.timeout(300000), // Year feeds are tens of MB
+  });
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status} for feed ${name}`);
+  }
+
+  const json = await gunzipAsync(Buffer.from(await response.arrayBuffer()));
+  const data = JSON.parse(json.toString('utf-8'));
+
+  const results = new Map<string, NvdResult>();
+  for (const item of data.vulnerabilities || []) {
+    const cve = item.cve;
+    if (cve?.id && isTracked(cve.id)) {
+      results.set(cve.id, parseNvdCve(cve));
+    }
+  }
+
+  // NVD timestamps are UTC but carry no zone designator
+  const generatedAt = data.timestamp ? new Date(`${String(data.timestamp).replace(/Z$/, '')}Z`) : null;
+
+  return { results, generatedAt: generatedAt && !isNaN(generatedAt.getTime()) ? generatedAt : null };
+}
+
 /**
  * Parse a single CVE from bulk NVD response into RecentCve format
  */
@@ -424,13 +569,14 @@ function parseRecentCve(cve: any, kevCveIds: Set<string>): RecentCve {
   }
 
   // Extract vendor/product from CPE configurations
+  // Appended in place - concat() would copy the accumulated list for every node
   const configurations = cve.configurations || [];
-  let cpeMatches: any[] = [];
+  const cpeMatches: any[] = [];
   for (const config of configurations) {
     const nodes = config.nodes || [];
     for (const node of nodes) {
       if (node.cpeMatch) {
-        cpeMatches = cpeMatches.concat(node.cpeMatch);
+        cpeMatches.push(...node.cpeMatch);
       }
     }
   }
@@ -296,12 +296,11 @@ export function generateRecentJs(): string {
         }
       };
 
+      const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' };
+
       function escapeHtml(str) {
         if (!str) return '';
-        return str.replace(/&/g, '&amp;')
-                  .replace(/</g, '&lt;')
-                  .replace(/>/g, '&gt;')
-                  .replace(/"/g, '&quot;');
+        return str.replace(/[&<>"]/g, ch => HTML_ESCAPES[ch]);
       }
 
       function renderRecentCves() {
@@ -340,25 +339,25 @@ export function generateRecentJs(): string {
         const tbody = document.getElementById('recentTableBody');
 
         const html = cves.map(cve => {
-          const severityClass = (cve.cvss_severity || 'none').toLowerCase();
+          const severityClass = escapeHtml((cve.cvss_severity || 'none').toLowerCase());
           const cvssDisplay = cve.cvss_score !== null ? cve.cvss_score.toFixed(1) : 'N/A';
 
           return \`<tr
-            data-cve="\${cve.cve_id.toLowerCase()}"
+            data-cve="\${escapeHtml(cve.cve_id.toLowerCase())}"
             data-cvss="\${cve.cvss_score ?? -1}"
             data-severity="\${severityClass}"
             data-vendor="\${escapeHtml((cve.vendor || '').toLowerCase())}"
             data-product="\${escapeHtml((cve.product || '').toLowerCase())}"
-            data-published="\${cve.published}"
+            data-published="\${escapeHtml(cve.published)}"
             data-patch="\${cve.has_patch ? 'patched' : 'unpatched'}"
             data-kev="\${cve.is_in_kev}"
           >
-            <td><a href="https://nvd.nist.gov/vuln/detail/\${cve.cve_id}" class="cve-link" target="_blank" rel="noopener">\${cve.cve_id}</a></td>
+            <td><a href="https://nvd.nist.gov/vuln/detail/\${escapeHtml(cve.cve_id)}" class="cve-link" target="_blank" rel="noopener">\${escapeHtml(cve.cve_id)}</a></td>
             <td class="cvss-\${severityClass}">\${cvssDisplay}</td>
-            <td><span class="severity-badge \${severityClass}">\${cve.cvss_severity || 'N/A'}</span></td>
+            <td><span class="severity-badge \${severityClass}">\${escapeHtml(cve.cvss_severity) || 'N/A'}</span></td>
             <td>\${escapeHtml(cve.vendor)}</td>
             <td>\${escapeHtml(cve.product)}</td>
-            <td>\${cve.published}</td>
+            <td>\${escapeHtml(cve.published)}</td>
             <td>\${cve.has_patch ? '<span class="badge patch">Patch</span>' : '<span class="badge no-patch">None</span>'}</td>
             <td>\${cve.is_in_kev ? '<span class="badge kev">KEV</span>' : ''}</td>
             <td class="description-cell">
@@ -1,12 +1,44 @@
-import type { CveResult, KevCatalog } from './types.js';
+import type { CveResult, KevCatalog, NvdResult, Summary } from './types.js';
 import { generateRecentTabHtml, generateRecentCss, generateRecentJs } from './recent-template.js';
 
+const HTML_ESCAPES: Record<string, string> = {
+  '&': '&amp;',
+  '<': '&lt;',
+  '>': '&gt;',
+  '"': '&quot;',
+};
+
+// Single pass over the string instead of one replace() per character
 const escapeHtml = (str: string): string =>
-  String(str || '')
-    .replace(/&/g, '&amp;')
-    .replace(/</g, '&lt;')
-    .replace(/>/g, '&gt;')
-    .replace(/"/g, '&quot;');
+  String(str || '').replace(/[&<>"]/g, (ch) => HTML_ESCAPES[ch]);
+
+// Markup that is already safe and must not be escaped again by html``
+class SafeHtml {
+  readonly value: string;
+
+  constructor(value: string) {
+    this.value = value;
+  }
+}
+
+const raw = (value: string): SafeHtml => new SafeHtml(value);
+
+/**
+ * Tagged template that HTML-escapes every interpolated value unless it is wrapped in raw()
+ */
+function html(strings: TemplateStringsArray, ...values: unknown[]): string {
+  let out = strings[0];
+  for (let i = 0; i < values.length; i++) {
+    const value = values[i];
+    out += (value instanceof SafeHtml ? value.value : escapeHtml(String(value ?? ''))) + strings[i + 1];
+  }
+  return out;
+}
+
+// The Recent CVEs tab is static, so render its pieces once at load instead of per report
+const RECENT_CSS = raw(generateRecentCss());
+const RECENT_TAB_HTML = raw(generateRecentTabHtml());
+const RECENT_JS = raw(generateRecentJs());
 
 function getCvssClass(score: number | null): string {
   if (score === null) return '';
@@ -16,69 +48,89 @@ function getCvssClass(score: number | null): string {
   return 'cvss-low';
 }
 
-function getStatusLabel(status: string): string {
-  const labels: Record<string, string> = {
-    UNPATCHED: 'Unpatched',
-    MITIGATION_ONLY: 'Mitigation',
-    PATCHED: 'Patched',
-    ERROR: 'Error',
-  };
-  return labels[status] || status;
-}
-
-export function generateHtml(results: CveResult[], kevData: KevCatalog): string {
+const NVD_DETAIL_URL = 'https://nvd.nist.gov/vuln/detail/';
+
+// Per-status display values, built once instead of per row
+const STATUS_LABELS: Record<NvdResult['status'], string> = {
+  UNPATCHED: 'Unpatched',
+  MITIGATION_ONLY: 'Mitigation',
+  PATCHED: 'Patched',
+  ERROR: 'Error',
+};
+
+const STATUS_CLASSES: Record<NvdResult['status'], string> = {
+  UNPATCHED: 'status-unpatched',
+  MITIGATION_ONLY: 'status-mitigation-only',
+  PATCHED: 'status-patched',
+  ERROR: 'status-error',
+};
+
+// Values for the row data-status attribute used by the client-side filters
+const STATUS_FILTER_KEYS: Record<NvdResult['status'], string> = {
+  UNPATCHED: 'unpatched',
+  MITIGATION_ONLY: 'mitigationonly',
+  PATCHED: 'patched',
+  ERROR: 'error',
+};
+
+/**
+ * Generate the HTML report as a sequence of chunks (head, one per table row, tail)
+ * so it can be streamed to disk without building the whole document in memory
+ */
+export function* generateHtml(results: CveResult[], kevData: KevCatalog, summary: Summary): Generator<string> {
   const total = results.length;
-  const patched = results.filter((r) => r.status === 'PATCHED').length;
-  const mitigationOnly = results.filter((r) => r.status === 'MITIGATION_ONLY').length;
-  const unpatched = results.filter((r) => r.status === 'UNPATCHED').length;
+  const { patched, mitigation_only: mitigationOnly, unpatched } = summary;
 
   // Sort by date_added descending (newest first), then by status
   const statusOrder: Record<string, number> = { UNPATCHED: 0, MITIGATION_ONLY: 1, ERROR: 2, PATCHED: 3 };
-  const sortedResults = [...results].sort((a, b) => {
-    // First by date (newest first)
-    const dateCompare = b.date_added.localeCompare(a.date_added);
-    if (dateCompare !== 0) return dateCompare;
-    // Then by status
-    return (statusOrder[a.status] ?? 99) - (statusOrder[b.status] ?? 99);
-  });
+  // Keys are computed once per row rather than on every comparison; dates are
+  // YYYY-MM-DD so plain string comparison orders them without localeCompare
+  const sortedResults = results
+    .map((r) => ({ r, date: r.date_added, rank: statusOrder[r.status] ?? 99 }))
+    .sort((a, b) => {
+      // First by date (newest first)
+      if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+      // Then by status
+      return a.rank - b.rank;
+    })
+    .map(({ r }) => r);
 
   const now = new Date().toISOString().replace('T', ' ').substring(0, 16) + ' UTC';
   const kevCount = kevData.vulnerabilities?.length || 0;
 
   // Generate table rows with all data attributes for sorting/filtering
-  const tableRows = sortedResults
-    .map((r) => {
-      const statusClass = `status-${r.status.toLowerCase().replace('_', '-')}`;
-      const ransomwareClass = r.known_ransomware === 'Known' ? 'ransomware-yes' : '';
-      const cvssClass = getCvssClass(r.cvss_score);
-      const cvssDisplay = r.cvss_score !== null ? r.cvss_score.toFixed(1) : 'N/A';
-
-      return `<tr
-        data-status="${r.status.toLowerCase().replace('_', '')}"
+  // Every field goes through html``, so vendor/product/description text is always escaped
+  const renderRow = (r: CveResult): string => {
+    const statusClass = STATUS_CLASSES[r.status];
+    const ransomwareClass = r.known_ransomware === 'Known' ? 'ransomware-yes' : '';
+    const cvssClass = getCvssClass(r.cvss_score);
+    const cvssDisplay = r.cvss_score !== null ? r.cvss_score.toFixed(1) : 'N/A';
+
+    return html`<tr
+        data-status="${STATUS_FILTER_KEYS[r.status]}"
         data-kevadded="${r.date_added}"
         data-published="${r.nvd_published || ''}"
         data-cvss="${r.cvss_score ?? -1}"
-        data-vendor="${escapeHtml(r.vendor.toLowerCase())}"
-        data-product="${escapeHtml(r.product.toLowerCase())}"
+        data-vendor="${r.vendor.toLowerCase()}"
+        data-product="${r.product.toLowerCase()}"
         data-cve="${r.cve_id.toLowerCase()}"
-        data-ransomware="${escapeHtml(r.known_ransomware.toLowerCase())}"
+        data-ransomware="${r.known_ransomware.toLowerCase()}"
       >
-        <td><a href="https://nvd.nist.gov/vuln/detail/${r.cve_id}" class="cve-link" target="_blank" rel="noopener">${r.cve_id}</a></td>
+        <td><a href="${NVD_DETAIL_URL}${r.cve_id}" class="cve-link" target="_blank" rel="noopener">${r.cve_id}</a></td>
         <td class="${cvssClass}">${cvssDisplay}</td>
-        <td>${escapeHtml(r.vendor)}</td>
-        <td>${escapeHtml(r.product)}</td>
-        <td><span class="status ${statusClass}">${getStatusLabel(r.status)}</span></td>
-        <td class="${ransomwareClass}">${escapeHtml(r.known_ransomware)}</td>
+        <td>${r.vendor}</td>
+        <td>${r.product}</td>
+        <td><span class="status ${statusClass}">${STATUS_LABELS[r.status]}</span></td>
+        <td class="${ransomwareClass}">${r.known_ransomware}</td>
         <td>${r.nvd_published || 'N/A'}</td>
         <td>${r.date_added}</td>
         <td class="description-cell">
-          <span class="description-text" title="${escapeHtml(r.short_description)}">${escapeHtml(r.short_description.substring(0, 60))}${r.short_description.length > 60 ? '...' : ''}</span>
+          <span class="description-text" title="${r.short_description}">${r.short_description_trunc}</span>
         </td>
       </tr>`;
-    })
-    .join('');
+  };
 
-  return `<!DOCTYPE html>
+  yield html`<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
@@ -230,7 +282,7 @@ export function generateHtml(results: CveResult[], kevData: KevCatalog): string
       display: block;
     }
 
-    ${generateRecentCss()}
+    ${RECENT_CSS}
 
     .filter-controls { margin-bottom: 20px; display: flex; gap: 10px; flex-wrap: wrap; align-items: center; }
 
@@ -427,7 +479,13 @@ export function generateHtml(results: CveResult[], kevData: KevCatalog): string
         </tr>
       </thead>
       <tbody>
-        ${tableRows}
+        `;
+
+  for (const r of sortedResults) {
+    yield renderRow(r);
+  }
+
+  yield html`
       </tbody>
     </table>
 
@@ -436,7 +494,7 @@ export function generateHtml(results: CveResult[], kevData: KevCatalog): string
     </div>
     </div><!-- end #kev-content -->
 
-    ${generateRecentTabHtml()}
+    ${RECENT_TAB_HTML}
 
     <footer>
       <p>Data sourced from <a href="https://www.cisa.gov/known-exploited-vulnerabilities-catalog" target="_blank" rel="noopener">CISA KEV Catalog</a>
@@ -602,7 +660,7 @@ export function generateHtml(results: CveResult[], kevData: KevCatalog): string
       });
     });
 
-    ${generateRecentJs()}
+    ${RECENT_JS}
   </script>
 </body>
 </html>`;
@@ -28,6 +28,7 @@ export interface NvdResult {
   cvss_score: number | null;
   cvss_severity: string | null;
   nvd_published: string | null;
+  nvd_last_modified: string | null;
   error: string | null;
 }
 
@@ -41,6 +42,7 @@ export interface CveResult extends NvdResult {
   required_action: string;
   known_ransomware: string;
   short_description: string;
+  short_description_trunc: string; // Truncated to 60 chars for the report table, not written to data.json
   notes: string;
 }
 
@@ -56,7 +58,18 @@ export interface OutputData {
   total_kev: number;
   total_checked: number;
   summary: Summary;
-  vulnerabilities: CveResult[];
+  vulnerabilities: Omit<CveResult, 'short_description_trunc'>[]; // Display-only fields are not published
+}
+
+// NVD lookup cache - persisted to S3 so re-runs skip CVEs checked recently
+export interface NvdCacheEntry {
+  fetched_at: string;
+  result: NvdResult;
+}
+
+export interface NvdCache {
+  last_sync: string | null;              // End of the last lastModified sync, entries are current as of this time
+  entries: Record<string, NvdCacheEntry>; // Keyed by CVE ID
 }
 
 // Throttle state - persisted to S3 for tracking 429 errors
@@ -86,7 +99,7 @@ export const DEFAULT_THROTTLE: ThrottleState = {
 // Throttle bounds (for adaptive concurrency with S3 cache)
 export const THROTTLE_BOUNDS = {
   min_concurrency: 1,
-  max_concurrency: 3,
+  max_concurrency: 8,         // Sliding window in nvd.ts keeps this under the NVD limit
   min_delay_ms: 0,           // Not used
   max_delay_ms: 0,           // Not used
   // Speed up after N consecutive successful runs